@@ -1,6 +1,11 @@
 # app/celery.py
+import logging
 import os
+import sys
 from celery import Celery
+from celery.signals import worker_init, worker_process_init
+
+logger = logging.getLogger(__name__)
 
 # Set the default Django settings module
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
@@ -11,5 +16,77 @@ app = Celery('easygov')
 # Load settings from Django settings with a namespace
 app.config_from_object('django.conf:settings', namespace='CELERY')
 
+# Route network-bound summarization work to its own queue so it can run on
+# an eventlet pool with high concurrency (PDF downloads + LLM API calls are
+# IO-bound), while the default queue keeps prefork workers:
+#   celery -A app.celery worker -Q summaries --pool=eventlet -c 50
+app.conf.task_routes = {
+    'core.tasks.summarize_document_task': {'queue': 'summaries'},
+}
+
 # Auto-discover tasks in all registered Django apps
-app.autodiscover_tasks()
\ No newline at end of file
+app.autodiscover_tasks()
+
+
+def _eventlet_patched():
+    eventlet = sys.modules.get('eventlet')
+    if eventlet is None:
+        return False
+    try:
+        return eventlet.patcher.is_monkey_patched('socket')
+    except Exception:
+        return False
+
+
+# Celery applies -P eventlet monkey-patching before importing the app module,
+# and the eventlet pool never sends worker_process_init, so psycopg2 must be
+# green-patched right here at import time. Without it every ORM call blocks
+# the whole 50-greenlet pool for the duration of the query.
+if _eventlet_patched():
+    try:
+        from psycogreen.eventlet import patch_psycopg
+        patch_psycopg()
+        logger.info("Patched psycopg2 for the eventlet pool")
+    except ImportError:
+        logger.warning(
+            "Running under eventlet without psycogreen: database calls will "
+            "block the whole greenlet pool"
+        )
+
+
+def _reset_db_connections():
+    """
+    Close any connections inherited from the parent (or opened before the
+    pool started) so this process opens its own, which CONN_MAX_AGE then
+    reuses across tasks.
+    """
+    from django.db import connections
+    connections.close_all()
+
+
+def _warm_shared_clients():
+    """
+    Build the process-wide Summarizer and ExplanationGenerator eagerly so
+    the first task doesn't pay their construction cost.
+    """
+    from core.tasks import get_summarizer, get_explanation_generator
+    get_summarizer()
+    get_explanation_generator()
+
+
+@worker_process_init.connect
+def init_forked_worker(**kwargs):
+    # Prefork children get their per-process init from this signal
+    _reset_db_connections()
+    _warm_shared_clients()
+
+
+@worker_init.connect
+def init_green_worker(**kwargs):
+    # The eventlet/gevent pools never dispatch worker_process_init — the
+    # main process is the pool — so run the same init from worker_init
+    # there. Prefork parents skip it (children handle their own).
+    if not _eventlet_patched():
+        return
+    _reset_db_connections()
+    _warm_shared_clients()
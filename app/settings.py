@@ -123,12 +123,34 @@ LOGGING = {
 
 # app/settings.py
 
+REST_FRAMEWORK = {
+    # orjson renderer: much cheaper JSON encoding for large list payloads
+    'DEFAULT_RENDERER_CLASSES': [
+        'core.renderers.ORJSONRenderer',
+    ],
+}
+
+# Cache (shares the Redis instance used as the Celery broker)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ.get('REDIS_URL', 'redis://localhost:6379/1'),
+    }
+}
+
 # Celery Settings
 CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_URL', 'redis://localhost:6379/0')
 CELERY_RESULT_BACKEND = os.environ.get('CELERY_RESULT_BACKEND', 'redis://localhost:6379/0')
-CELERY_ACCEPT_CONTENT = ['json']
-CELERY_TASK_SERIALIZER = 'json'
-CELERY_RESULT_SERIALIZER = 'json'
+# msgpack payloads are smaller and cheaper to (de)serialize than JSON;
+# keep accepting json so in-flight tasks survive a rolling deploy
+CELERY_ACCEPT_CONTENT = ['msgpack', 'json']
+CELERY_TASK_SERIALIZER = 'msgpack'
+CELERY_RESULT_SERIALIZER = 'msgpack'
+CELERY_BROKER_TRANSPORT_OPTIONS = {
+    'visibility_timeout': 3600,  # summarization tasks can run for minutes
+    'socket_keepalive': True,
+    'health_check_interval': 30,
+}
 # CELERY_TIMEZONE = TIME_ZONE
 
 
@@ -199,6 +221,7 @@ if DATABASE_URL:
         'default': dj_database_url.config(
             default=DATABASE_URL,
             conn_max_age=600,
+            conn_health_checks=True,  # Verify reused connections instead of failing mid-request
             ssl_require=not os.getenv('DEBUG', 'False').lower() == 'true'  # Disable SSL if DEBUG=True
         )
     }
@@ -211,6 +234,10 @@ else:
             'PASSWORD': os.getenv('DB_PASSWORD', ''),
             'HOST': os.getenv('DB_HOST', ''),
             'PORT': os.getenv('DB_PORT', '5432'),
+            # Keep connections alive across requests/tasks instead of paying
+            # TCP+auth setup on every one
+            'CONN_MAX_AGE': 60,
+            'CONN_HEALTH_CHECKS': True,
         }
     }
 
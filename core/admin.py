@@ -1,7 +1,10 @@
 # core/admin.py
 from django.contrib import admin
+from django.db.models import Exists, OuterRef
+from django.http import HttpResponseRedirect
 from .models import Document, Summary, FactCheck
 from django import forms
+import re
 
 class DocumentAdminForm(forms.ModelForm):
     class Meta:
@@ -16,152 +19,139 @@ class DocumentAdminForm(forms.ModelForm):
             raise forms.ValidationError("You must provide either a PDF file or a PDF URL.")
         return cleaned_data
 
+class SummaryInline(admin.TabularInline):
+    model = Summary
+    extra = 0
+    readonly_fields = ['language', 'created_at']
+    fields = ['language', 'text', 'created_at']
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False  # Summaries are created automatically
+
 @admin.register(Document)
 class DocumentAdmin(admin.ModelAdmin):
     form = DocumentAdminForm
-    list_display = ('title', 'region', 'uploaded_at', 'summarization_processed', 'should_summarize')
+    list_display = ('title', 'region', 'pdf_link', 'uploaded_at', 'summarization_processed', 'should_summarize', 'is_verified')
+    list_editable = ('is_verified',)
     list_filter = ('region', 'summarization_processed', 'should_summarize')
     search_fields = ('title',)
     fields = ('title', 'pdf_file', 'pdf_url', 'source_url', 'is_verified', 'region', 'should_summarize')
+    inlines = [SummaryInline]
+    actions = ['mark_as_verified', 'mark_as_unverified', 'trigger_resummary']
+
+    def pdf_link(self, obj):
+        # Read .name rather than .url — .url can dispatch to the storage
+        # backend (an existence check / signed-URL call) once per row
+        return obj.pdf_file.name if obj.pdf_file else '-'
+    pdf_link.short_description = 'PDF file'
+
+    def changelist_view(self, request, extra_context=None):
+        # list_editable saves one row at a time by default, and every
+        # Document.save() re-reads the old row and syncs fact checks. Collect
+        # the edited is_verified checkboxes instead and apply them as at most
+        # two bulk UPDATEs per value (documents, then their fact checks).
+        if (request.method == 'POST' and '_save' in request.POST
+                and not request.POST.get('action')
+                and self.has_change_permission(request)):
+            ids_by_value = {True: [], False: []}
+            for key, value in request.POST.items():
+                match = re.match(r'^form-(\d+)-id$', key)
+                if not match:
+                    continue
+                checked = f"form-{match.group(1)}-is_verified" in request.POST
+                ids_by_value[checked].append(value)
+            changed_total = 0
+            for is_verified, ids in ids_by_value.items():
+                if not ids:
+                    continue
+                changed_ids = list(
+                    Document.objects.filter(pk__in=ids)
+                    .exclude(is_verified=is_verified)
+                    .values_list('pk', flat=True)
+                )
+                if changed_ids:
+                    Document.objects.filter(pk__in=changed_ids).update(is_verified=is_verified)
+                    FactCheck.objects.filter(summary__document_id__in=changed_ids).update(is_verified=is_verified)
+                    changed_total += len(changed_ids)
+            self.message_user(request, f"{changed_total} documents updated.")
+            return HttpResponseRedirect(request.get_full_path())
+        return super().changelist_view(request, extra_context)
+
+    def mark_as_verified(self, request, queryset):
+        # Two bulk UPDATEs instead of one query per summary
+        updated = queryset.update(is_verified=True)
+        FactCheck.objects.filter(summary__document__in=queryset).update(is_verified=True)
+        self.message_user(request, f"{updated} documents marked as verified.")
+    mark_as_verified.short_description = "Mark selected documents as verified"
+
+    def mark_as_unverified(self, request, queryset):
+        updated = queryset.update(is_verified=False)
+        FactCheck.objects.filter(summary__document__in=queryset).update(is_verified=False)
+        self.message_user(request, f"{updated} documents marked as unverified.")
+    mark_as_unverified.short_description = "Mark selected documents as unverified"
+
+    def trigger_resummary(self, request, queryset):
+        import hashlib
+        from django.core.cache import cache
+        from .models import SUMMARY_CACHE_LANGUAGES
+        from .sdg import document_pdf_source
+        from .tasks import summarize_document_task
+
+        # The task skips any (document, language) pair that already has a
+        # row, so re-generation requires dropping the old summaries (fact
+        # checks cascade) and the cached summarization results first —
+        # otherwise the action would only clear the processed flag and
+        # nothing would ever be rebuilt.
+        stale_keys = []
+        for document in queryset:
+            source = document_pdf_source(document)
+            if source:
+                source_hash = hashlib.sha256(source.encode()).hexdigest()[:24]
+                stale_keys.extend(
+                    f"summary:{source_hash}:{lang}" for lang in SUMMARY_CACHE_LANGUAGES
+                )
+        if stale_keys:
+            cache.delete_many(stale_keys)
+        Summary.objects.filter(document__in=queryset).delete()
+
+        # Single UPDATE to reset the flag, then queue by id; stream ids with
+        # a server-side cursor so huge selections don't get materialized
+        count = queryset.update(summarization_processed=False)
+        for doc_id in queryset.values_list('id', flat=True).iterator(chunk_size=500):
+            summarize_document_task.delay(doc_id)
+        self.message_user(request, f"{count} documents queued for re-summarization.")
+    trigger_resummary.short_description = "Re-generate summaries for selected documents"
 
 @admin.register(Summary)
 class SummaryAdmin(admin.ModelAdmin):
-    list_display = ('document', 'language', 'created_at')
+    list_display = ('document', 'language', 'created_at', 'has_fact_check', 'is_verified')
     list_filter = ('language',)
     search_fields = ('document__title', 'text')
+    # Summary.__str__ touches document.title; fetch it with the changelist
+    # query instead of once per row
+    list_select_related = ('document',)
+
+    def get_queryset(self, request):
+        # EXISTS subqueries are evaluated inside the changelist query, so the
+        # two boolean columns add zero extra queries per page
+        return super().get_queryset(request).select_related('document').annotate(
+            has_fc=Exists(FactCheck.objects.filter(summary=OuterRef('pk'))),
+            fc_verified=Exists(FactCheck.objects.filter(summary=OuterRef('pk'), is_verified=True)),
+        )
+
+    def has_fact_check(self, obj):
+        return obj.has_fc
+    has_fact_check.boolean = True
+    has_fact_check.short_description = 'Fact Check'
+
+    def is_verified(self, obj):
+        return obj.fc_verified
+    is_verified.boolean = True
+    is_verified.short_description = 'Verified'
 
 @admin.register(FactCheck)
 class FactCheckAdmin(admin.ModelAdmin):
     list_display = ('summary', 'is_verified', 'checked_at')
     list_filter = ('is_verified',)
-
-
-
-
-
-
-# # core/admin.py
-# from django.contrib import admin
-# from django.contrib.admin.actions import delete_selected
-# from django.contrib import messages
-# from .models import Document, Summary, FactCheck
-
-# class SummaryInline(admin.TabularInline):
-#     model = Summary
-#     extra = 0
-#     readonly_fields = ['language', 'created_at']
-#     fields = ['language', 'text', 'created_at']
-#     can_delete = False
-    
-#     def has_add_permission(self, request, obj=None):
-#         return False  # Summaries are created automatically
-
-# class FactCheckInline(admin.TabularInline):
-#     model = FactCheck
-#     extra = 0
-#     fields = ['source_url', 'is_verified', 'checked_at']
-#     readonly_fields = ['checked_at']
-
-# @admin.register(Document)
-# class DocumentAdmin(admin.ModelAdmin):
-#     list_display = ['title', 'region', 'is_verified', 'summarization_processed']
-#     list_filter = ['region', 'is_verified', 'summarization_processed']
-#     search_fields = ['title']
-#     readonly_fields = ['uploaded_at', 'summarization_processed']
-#     list_editable = ['is_verified']
-#     inlines = [SummaryInline]
-#     fieldsets = (
-#         (None, {
-#             'fields': ('title', 'pdf_url', 'region')
-#         }),
-#         ('Verification', {
-#             'fields': ('source_url', 'is_verified')
-#         }),
-#         ('Processing Status', {
-#             'fields': ('uploaded_at', 'summarization_processed', 'should_summarize'),
-#             'classes': ('collapse',)
-#         })
-#     )
-    
-#     # Include default delete action and custom actions
-#     actions = [delete_selected, 'mark_as_verified', 'mark_as_unverified', 'trigger_summarization']
-
-#     def save_model(self, request, obj, form, change):
-#         """Override save_model to handle summarization queuing"""
-#         # For new documents, we can let it be processed normally
-#         # Celery will handle the processing in the background
-#         super().save_model(request, obj, form, change)
-        
-#         # Show a helpful message
-#         if not change:  # New document
-#             messages.info(request, "Document saved. Summarization will be processed in the background.")
-
-#     def mark_as_verified(self, request, queryset):
-#         """Mark documents as verified"""
-#         updated = queryset.update(is_verified=True)
-#         for doc in queryset:
-#             for summary in doc.summaries.all():
-#                 FactCheck.objects.filter(summary=summary).update(is_verified=True)
-#         self.message_user(request, f"{updated} documents marked as verified.")
-#     mark_as_verified.short_description = "Mark selected documents as verified"
-
-#     def mark_as_unverified(self, request, queryset):
-#         """Mark documents as unverified"""
-#         updated = queryset.update(is_verified=False)
-#         for doc in queryset:
-#             for summary in doc.summaries.all():
-#                 FactCheck.objects.filter(summary=summary).update(is_verified=False)
-#         self.message_user(request, f"{updated} documents marked as unverified.")
-#     mark_as_unverified.short_description = "Mark selected documents as unverified"
-    
-#     def trigger_summarization(self, request, queryset):
-#         """Manually trigger summarization for selected documents"""
-#         # Import Celery task
-#         from .tasks import process_document_summaries
-        
-#         count = 0
-#         for doc in queryset:
-#             # Queue the task for processing
-#             process_document_summaries.delay(doc.id)
-#             count += 1
-            
-#         self.message_user(request, f"{count} documents queued for re-summarization. Processing will happen in the background.")
-#     trigger_summarization.short_description = "Re-generate summaries for selected documents"
-
-# @admin.register(Summary)
-# class SummaryAdmin(admin.ModelAdmin):
-#     list_display = ['id', 'document_title', 'language', 'created_at', 'has_fact_check', 'is_verified']
-#     list_filter = ['language', 'created_at']
-#     search_fields = ['document__title', 'text']
-#     readonly_fields = ['document', 'language', 'created_at', 'text']
-#     inlines = [FactCheckInline]
-    
-#     def document_title(self, obj):
-#         return obj.document.title
-#     document_title.short_description = 'Document'
-    
-#     def has_fact_check(self, obj):
-#         return FactCheck.objects.filter(summary=obj).exists()
-#     has_fact_check.boolean = True
-#     has_fact_check.short_description = 'Fact Check'
-    
-#     def is_verified(self, obj):
-#         fact_check = FactCheck.objects.filter(summary=obj).first()
-#         return fact_check.is_verified if fact_check else False
-#     is_verified.boolean = True
-#     is_verified.short_description = 'Verified'
-    
-#     def has_add_permission(self, request):
-#         return False  # Summaries are created automatically
-
-# @admin.register(FactCheck)
-# class FactCheckAdmin(admin.ModelAdmin):
-#     list_display = ['id', 'summary_title', 'is_verified', 'checked_at']
-#     list_filter = ['is_verified', 'checked_at']
-#     list_editable = ['is_verified']
-#     search_fields = ['summary__document__title', 'source_url']
-#     readonly_fields = ['checked_at']
-    
-#     def summary_title(self, obj):
-#         return f"{obj.summary.document.title} ({obj.summary.language})"
-#     summary_title.short_description = 'Summary'
\ No newline at end of file
+    list_select_related = ('summary__document',)
@@ -1,69 +1,212 @@
 # core/api_views.py
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse, StreamingHttpResponse
 from rest_framework import viewsets
 from rest_framework.response import Response
+from django.db.models import Max, Min, Prefetch, Q
+from django.utils.decorators import method_decorator
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.decorators.cache import cache_page
 from .models import Document, Summary, FactCheck
 from regions.models import Region
 from .api_serializers import RegionSerializer
-from .explanation_generator import ExplanationGenerator
+from .tasks import (
+    extract_original_excerpt,
+    generate_explanation_task,
+    summarize_document_task,
+)
+import json
 import logging
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 logger = logging.getLogger(__name__)
 
+# Languages the API may serve/generate, straight from the model field
+_SUPPORTED_LANGUAGES = frozenset(
+    code for code, _ in Summary._meta.get_field('language').choices
+)
+
+# The schema is fixed at import time; check the model once instead of
+# calling hasattr() per summary on the hot path.
+_SUMMARY_HAS_ORIGINAL_TEXT = any(f.name == 'original_text' for f in Summary._meta.get_fields())
+_SUMMARY_HAS_EXPLANATION = any(f.name == 'explanation' for f in Summary._meta.get_fields())
+
+def _get_region(code):
+    """
+    Regions are static reference data; cache them by code so the hot list
+    endpoint doesn't pay a DB round-trip per request. Invalidated by the
+    post_save signal on Region.
+    """
+    return cache.get_or_set(f'region:{code}', lambda: Region.objects.get(code=code), 3600)
+
 class SummaryViewSet(viewsets.ViewSet):
     def list(self, request):
         logger.debug("Entering SummaryViewSet.list")
-        # Initialize ExplanationGenerator here instead of __init__
-        explanation_generator = ExplanationGenerator()
-        logger.info("ExplanationGenerator initialized successfully")
-
         region_code = request.query_params.get('region', 'UG')
         language = request.query_params.get('language', 'en')
         
-        if language != 'en':
-            logger.warning(f"Only English summaries are supported, received language={language}")
+        # Validate against the model's declared languages: anything else must
+        # never reach the dispatch loop below, where each distinct value
+        # would trigger one full summarization pipeline per document (and
+        # values over 10 chars can't even be stored).
+        if language not in _SUPPORTED_LANGUAGES:
+            logger.warning(f"Unsupported summary language requested: {language}")
             return Response({'error': 'Only English summaries are supported'}, status=400)
         
         logger.info(f"Fetching summaries for region_code={region_code}, language={language}")
 
         try:
-            logger.debug(f"Querying Region with code={region_code}")
-            region = Region.objects.get(code=region_code)
-            logger.debug(f"Found Region: id={region.id}, name={region.name}")
+            logger.debug("Querying Region with code=%s", region_code)
+            region = _get_region(region_code)
+            logger.debug("Found Region: id=%s, name=%s", region.id, region.name)
         except Region.DoesNotExist:
             logger.warning(f"Region not found: code={region_code}")
             return Response({'error': 'Region not found'}, status=404)
 
-        logger.debug(f"Querying Summaries for region_id={region.id}, language={language}")
+        # Serve repeat hits straight from Redis; the key is invalidated by
+        # post_save signals on Document/Summary. The entry carries the
+        # Last-Modified stamp so conditional requests still get 304s while
+        # the cache is warm.
+        cache_key = f'summaries:{region_code}:{language}'
+        cached = cache.get(cache_key)
+        if cached is not None:
+            cached_body, cached_last_modified = cached
+            if cached_last_modified:
+                if_modified_since = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE', ''))
+                if if_modified_since is not None and if_modified_since >= cached_last_modified:
+                    logger.debug("Cached summaries unchanged since If-Modified-Since, returning 304")
+                    not_modified = HttpResponse(status=304)
+                    not_modified['Vary'] = 'Accept-Language'
+                    return not_modified
+            logger.info(f"Serving summaries for {region_code}/{language} from cache")
+            response = HttpResponse(cached_body, content_type='application/json')
+            response['Vary'] = 'Accept-Language'
+            if cached_last_modified:
+                response['Last-Modified'] = http_date(cached_last_modified)
+            return response
+
+        # Single query for every document in the region still missing a summary
+        # in this language, instead of one existence check per document.
+        logger.debug("Querying documents without a %s summary for region_id=%s", language, region.id)
+        # should_summarize=True: documents flagged "add without
+        # auto-summarization" must not get summarized just because someone
+        # listed the API.
+        missing = list(
+            Document.objects.filter(region=region, should_summarize=True)
+            .exclude(summaries__language=language)
+            .only('id', 'title')
+        )
+        if missing:
+            # Summarization blocks on PDF downloads and LLM calls, so hand the
+            # missing documents to Celery workers and report them as pending.
+            logger.info(f"Queueing {len(missing)} documents for background summarization")
+            for document in missing:
+                summarize_document_task.delay(document.id, language)
+                logger.debug("Queued summarize_document_task for document %s", document.id)
+
+        logger.debug("Querying Summaries for region_id=%s, language=%s", region.id, language)
+        # Deduplicate per document in SQL (earliest summary wins) instead of
+        # hydrating every duplicate row and filtering in Python. The subquery
+        # form works on both Postgres and SQLite.
+        matching = Summary.objects.filter(document__region=region, language=language)
+
+        # Conditional GET: a fully enriched summary set only changes when new
+        # rows are added, so the newest created_at doubles as Last-Modified.
+        # Skip it while rows are pending or still being enriched by workers.
+        last_modified = None
+        if not missing and not matching.filter(
+            Q(original_text__isnull=True) | Q(explanation__isnull=True)
+        ).exists():
+            last_modified = matching.aggregate(Max('created_at'))['created_at__max']
+        if last_modified:
+            if_modified_since = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE', ''))
+            if if_modified_since is not None and if_modified_since >= int(last_modified.timestamp()):
+                logger.debug("Summaries unchanged since If-Modified-Since, returning 304")
+                not_modified = HttpResponse(status=304)
+                not_modified['Vary'] = 'Accept-Language'
+                return not_modified
+
         summaries = Summary.objects.filter(
-            document__region=region, 
-            language=language
-        ).select_related('document').order_by('document__id')
-        logger.info(f"Retrieved {summaries.count()} summaries")
+            id__in=matching.values('document_id').annotate(mid=Min('id')).values('mid')
+        ).select_related('document', 'document__region').prefetch_related(
+            # One extra query for all fact checks instead of one per summary
+            Prefetch(
+                'fact_checks',
+                queryset=FactCheck.objects.only('id', 'summary_id', 'source_url', 'is_verified'),
+                to_attr='_prefetched_factchecks'
+            )
+        ).only(
+            'id', 'text', 'original_text', 'explanation', 'language', 'created_at',
+            'document__title', 'document__pdf_file', 'document__pdf_url',
+            'document__source_url', 'document__is_verified',
+            'document__region__name', 'document__region__code'
+        ).order_by('document__id')
+
+        def stream_items():
+            yield from self._serialize_summaries(summaries.iterator(chunk_size=100), region)
+            for document in missing:
+                yield {
+                    'document_title': document.title,
+                    'status': 'pending',
+                    'language': language,
+                    'region_name': region.name
+                }
+
+        def stream_and_cache(chunks):
+            parts = []
+            for chunk in chunks:
+                parts.append(chunk)
+                yield chunk
+            # Only cache complete responses — pending markers would otherwise
+            # be served for 5 minutes after the summaries finish. Store the
+            # Last-Modified timestamp with the body for the hit path.
+            if not missing:
+                last_modified_ts = int(last_modified.timestamp()) if last_modified else None
+                cache.set(cache_key, (''.join(parts), last_modified_ts), 300)
+                logger.debug("Cached summaries response under %s", cache_key)
+
+        logger.debug("Exiting SummaryViewSet.list (streaming response)")
+        response = StreamingHttpResponse(
+            stream_and_cache(self._stream_json(stream_items())),
+            content_type='application/json'
+        )
+        response['Vary'] = 'Accept-Language'
+        if last_modified:
+            response['Last-Modified'] = http_date(last_modified.timestamp())
+        return response
+
+    def _stream_json(self, items):
+        # Encode one item at a time so large text blobs are never all
+        # resident at once. orjson encodes datetimes natively and is 2-4x
+        # faster than the stdlib encoder when it's available.
+        yield '['
+        first = True
+        for item in items:
+            if first:
+                first = False
+            else:
+                yield ','
+            if orjson is not None:
+                yield orjson.dumps(item, default=str).decode()
+            else:
+                yield json.dumps(item, cls=DjangoJSONEncoder)
+        yield ']'
 
-        unique_documents = set()
-        unique_summaries = []
+    def _serialize_summaries(self, summaries, region):
+        # Rows arrive already deduplicated per document. Enrichment fields
+        # that aren't stored yet are queued for Celery workers and returned
+        # as null, so nothing here blocks on PDF downloads or LLM calls —
+        # which also removes the need for the request-side thread pool.
         for summary in summaries:
-            if summary.document.id not in unique_documents:
-                unique_documents.add(summary.document.id)
-                unique_summaries.append(summary)
-                logger.debug(f"Added unique summary: id={summary.id}, document_id={summary.document.id}")
-        
-        logger.info(f"Found {len(unique_summaries)} unique summaries for region_code={region_code}, language={language}")
-        
-        response_data = []
-        for summary in unique_summaries:
-            logger.debug(f"Processing summary: id={summary.id}, document_title={summary.document.title}")
-            
             fact_check_data = self._get_fact_check_data(summary)
-            logger.debug(f"Fact check data for summary {summary.id}: {fact_check_data}")
-            
             original_text = self._get_original_excerpt(summary)
-            logger.debug(f"Original text for summary {summary.id}: {original_text[:100]}...")
-            
-            explanation = self._get_real_explanation(summary, region.name, explanation_generator)
-            logger.debug(f"Explanation for summary {summary.id}: {explanation[:100]}...")
-            
-            response_data.append({
+            explanation = self._get_real_explanation(summary, region.name)
+
+            yield {
                 'id': summary.id,
                 'document_title': summary.document.title,
                 'text': summary.text,
@@ -73,20 +216,16 @@ class SummaryViewSet(viewsets.ViewSet):
                 'created_at': summary.created_at,
                 'factCheck': fact_check_data,
                 'region_name': region.name
-            })
-            logger.debug(f"Added response data for summary {summary.id}")
-            
-        logger.info(f"Returning response with {len(response_data)} summaries")
-        logger.debug("Exiting SummaryViewSet.list")
-        return Response(response_data)
+            }
     
     def _get_fact_check_data(self, summary):
-        logger.debug(f"Entering _get_fact_check_data for summary {summary.id}")
         try:
-            logger.debug(f"Querying FactCheck for summary {summary.id}")
-            fact_check = FactCheck.objects.filter(summary=summary).first()
+            fact_checks = getattr(summary, '_prefetched_factchecks', None)
+            if fact_checks is None:
+                fact_check = FactCheck.objects.filter(summary=summary).first()
+            else:
+                fact_check = fact_checks[0] if fact_checks else None
             if fact_check:
-                logger.debug(f"Found FactCheck: source_url={fact_check.source_url}, is_verified={fact_check.is_verified}")
                 return {
                     'source_url': fact_check.source_url,
                     'is_verified': fact_check.is_verified
@@ -96,9 +235,7 @@ class SummaryViewSet(viewsets.ViewSet):
         
         try:
             document = summary.document
-            logger.debug(f"Using document verification info for document {document.id}")
             if hasattr(document, 'is_verified'):
-                logger.debug(f"Document verification: source_url={document.source_url}, is_verified={document.is_verified}")
                 return {
                     'source_url': document.source_url or '',
                     'is_verified': document.is_verified
@@ -107,138 +244,60 @@ class SummaryViewSet(viewsets.ViewSet):
             logger.error(f"Error accessing document verification info for summary {summary.id}: {str(e)}")
         
         logger.warning(f"No fact check or document verification info for summary {summary.id}, returning defaults")
-        logger.debug("Exiting _get_fact_check_data")
         return {
             'source_url': '',
             'is_verified': False
         }
     
     def _get_original_excerpt(self, summary):
-        logger.debug(f"Entering _get_original_excerpt for summary {summary.id}")
         try:
-            if hasattr(summary, 'original_text') and summary.original_text:
-                logger.debug(f"Using stored original_text for summary {summary.id}: {summary.original_text[:100]}...")
+            if _SUMMARY_HAS_ORIGINAL_TEXT and summary.original_text:
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("Using stored original_text for summary %s: %s...", summary.id, summary.original_text[:100])
                 return summary.original_text
-                
-            sdg_keywords = [
-                'gender', 'women', 'girls', 'female', 'maternal', 
-                'gender-based violence', 'gender equality', 'gender parity',
-                'inequality', 'equity', 'disparity', 'marginalized', 'vulnerable',
-                'inclusion', 'inclusive', 'discrimination', 'minority',
-                'differently abled', 'disabilities', 'equal opportunity'
-            ]
-            logger.debug(f"Using SDG keywords: {sdg_keywords}")
-            
+
             document = summary.document
-            if not document.pdf_url:
-                logger.warning(f"No PDF URL for document {document.id}")
+            if not document.pdf_url and not document.pdf_file:
+                logger.warning(f"No PDF file or URL for document {document.id}")
                 return "PDF document not available."
-                
-            import pdfplumber
-            import tempfile
-            import requests
-            import re
-            logger.debug(f"Downloading PDF: {document.pdf_url}")
-            
-            if document.pdf_url.startswith(('http://', 'https://')):
-                response = requests.get(document.pdf_url, timeout=30)
-                response.raise_for_status()
-                logger.debug(f"PDF downloaded successfully, size={len(response.content)} bytes")
-                with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as temp_file:
-                    temp_file_path = temp_file.name
-                    temp_file.write(response.content)
-            else:
-                temp_file_path = document.pdf_url
-                logger.debug(f"Using local PDF path: {temp_file_path}")
-                
-            excerpts = []
-            with pdfplumber.open(temp_file_path) as pdf:
-                logger.debug(f"Processing PDF with {len(pdf.pages)} pages")
-                for i, page in enumerate(pdf.pages[:20]):
-                    page_text = page.extract_text() or ''
-                    if not page_text:
-                        logger.debug(f"Page {i+1} has no text")
-                        continue
-                        
-                    paragraphs = page_text.split('\n\n')
-                    logger.debug(f"Page {i+1} has {len(paragraphs)} paragraphs")
-                    
-                    for paragraph in paragraphs:
-                        paragraph = paragraph.strip()
-                        if not paragraph or len(paragraph) < 20:
-                            logger.debug(f"Skipping short/empty paragraph: {paragraph[:50]}...")
-                            continue
-                            
-                        if any(keyword.lower() in paragraph.lower() for keyword in sdg_keywords):
-                            cleaned = re.sub(r'\s+', ' ', paragraph).strip()
-                            excerpts.append(cleaned)
-                            logger.debug(f"Found SDG-relevant paragraph: {cleaned[:100]}...")
-            
-            if document.pdf_url.startswith(('http://', 'https://')) and temp_file_path:
-                import os
-                try:
-                    os.unlink(temp_file_path)
-                    logger.debug(f"Deleted temp file: {temp_file_path}")
-                except Exception as e:
-                    logger.warning(f"Failed to delete temp file {temp_file_path}: {str(e)}")
-                    
-            if excerpts:
-                result = '\n\n'.join(excerpts[:3])
-                logger.info(f"Extracted {len(result)} characters of original text for summary {summary.id}")
-                
-                if hasattr(summary, 'original_text'):
-                    summary.original_text = result
-                    summary.save(update_fields=['original_text'])
-                    logger.debug(f"Saved original_text to summary {summary.id}")
-                    
-                logger.debug("Exiting _get_original_excerpt with result")
-                return result
-                
-            logger.warning(f"No SDG-relevant text found in document {document.id}")
-            logger.debug("Exiting _get_original_excerpt with fallback")
-            return "No specific text related to gender equality or inequality reduction found in the document."
-            
+
+            # PDF download + parse would block the request thread; let a
+            # worker fill it in and return null so clients can re-fetch.
+            extract_original_excerpt.delay(summary.id)
+            logger.debug("Queued excerpt extraction for summary %s", summary.id)
+            return None
+
         except Exception as e:
-            logger.error(f"Error extracting original text for summary {summary.id}: {str(e)}")
-            logger.debug("Exiting _get_original_excerpt with error")
-            return f"Error extracting original text: {str(e)}"
-    
-    def _get_real_explanation(self, summary, region_name, explanation_generator):
-        logger.debug(f"Entering _get_real_explanation for summary {summary.id}")
+            logger.error(f"Error queueing excerpt extraction for summary {summary.id}: {str(e)}")
+            return None
+
+    def _get_real_explanation(self, summary, region_name):
         try:
-            if hasattr(summary, 'explanation') and summary.explanation:
-                logger.debug(f"Using stored explanation for summary {summary.id}: {summary.explanation[:100]}...")
+            if _SUMMARY_HAS_EXPLANATION and summary.explanation:
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("Using stored explanation for summary %s: %s...", summary.id, summary.explanation[:100])
                 return summary.explanation
-                
+
             region_context = region_name or getattr(summary.document.region, 'name', '')
-            logger.debug(f"Generating explanation with region_context={region_context}")
-            explanation = explanation_generator.generate_explanation(summary.text, region_context)
-            
-            if not explanation or len(explanation) < 50 or "Be specific about both positive and negative impacts" in explanation:
-                logger.warning(f"Invalid explanation for summary {summary.id}: {explanation[:100]}...")
-                explanation = explanation_generator._get_fallback_explanation(region_context)
-                logger.debug(f"Using fallback explanation: {explanation[:100]}...")
-            
-            if explanation and hasattr(summary, 'explanation'):
-                summary.explanation = explanation
-                summary.save(update_fields=['explanation'])
-                logger.debug(f"Saved explanation to summary {summary.id}")
-                
-            logger.info(f"Generated explanation for summary {summary.id}: {explanation[:100]}...")
-            logger.debug("Exiting _get_real_explanation")
-            return explanation
-            
+            # LLM calls don't belong on the request thread; a worker stores
+            # the explanation and the next fetch returns it.
+            generate_explanation_task.delay(summary.id, region_context)
+            logger.debug("Queued explanation generation for summary %s", summary.id)
+            return None
+
         except Exception as e:
-            logger.error(f"Error generating explanation for summary {summary.id}: {str(e)}")
-            region_context = region_name or getattr(summary.document.region, 'name', '')
-            fallback = explanation_generator._get_fallback_explanation(region_context)
-            logger.debug(f"Using fallback explanation due to error: {fallback[:100]}...")
-            logger.debug("Exiting _get_real_explanation with fallback")
-            return fallback
+            logger.error(f"Error queueing explanation generation for summary {summary.id}: {str(e)}")
+            return None
 
 class RegionViewSet(viewsets.ReadOnlyModelViewSet):
     logger.debug("Entering RegionViewSet")
     queryset = Region.objects.all()
     serializer_class = RegionSerializer
     lookup_field = 'code'
-    logger.debug("Exiting RegionViewSet initialization")
\ No newline at end of file
+    logger.debug("Exiting RegionViewSet initialization")
+
+    # Regions barely ever change; serve the rendered list from the cache
+    @method_decorator(cache_page(3600))
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
@@ -5,6 +5,27 @@ from langchain_core.prompts import PromptTemplate
 
 logger = logging.getLogger(__name__)
 
+# Built once at import; reused by single and batched generation
+_EXPLANATION_PROMPT = PromptTemplate.from_template(
+    """
+                You are an experienced female community leader who has worked in women’s development for many years. You're known for explaining all kinds of government documents in clear, relatable terms to women of all backgrounds, helping them understand what’s happening and what they can do.
+
+                Please create a warm, conversational message (100-150 words) explaining a government document{region_context}: "{summary_text}"
+
+                Your message should:
+                - Sound like friendly advice from a caring, knowledgeable woman working in women’s development
+                - Use a warm, encouraging tone without lists or technical jargon
+                - Explain what the document is about, using details from the summary, and why it matters to women’s lives (e.g., better education, healthcare, jobs)
+                - Clarify any laws, policies, or terms mentioned in the summary (e.g., specific laws, programs, or initiatives) in simple language
+                - Describe what the government is doing (e.g., starting programs, allocating funds) based on the summary
+                - Say when women might see changes (e.g., soon, this year)
+                - Suggest 2-3 specific actions women can take to benefit from or engage with the document’s initiatives (e.g., contact a specific office, join a group, attend a meeting)
+                - Recommend where to get more information (e.g., relevant ministry, local government office)
+
+                Use short sentences and simple words for all literacy levels. Focus on practical steps and positive impacts, ensuring actions and explanations are directly tied to the document’s content.
+    """
+)
+
 class ExplanationGenerator:
     """
     Generates simplified, actionable explanations for various government documents using OpenAI's API.
@@ -43,30 +64,10 @@ class ExplanationGenerator:
             logger.debug(f"Cleaned summary_text: {summary_text}")
                 
             region_context = f" in {region_name}" if region_name else ""
-            
-            prompt_template = PromptTemplate.from_template(
-                """
-                You are an experienced female community leader who has worked in women’s development for many years. You're known for explaining all kinds of government documents in clear, relatable terms to women of all backgrounds, helping them understand what’s happening and what they can do.
 
-                Please create a warm, conversational message (100-150 words) explaining a government document{region_context}: "{summary_text}"
-
-                Your message should:
-                - Sound like friendly advice from a caring, knowledgeable woman working in women’s development
-                - Use a warm, encouraging tone without lists or technical jargon
-                - Explain what the document is about, using details from the summary, and why it matters to women’s lives (e.g., better education, healthcare, jobs)
-                - Clarify any laws, policies, or terms mentioned in the summary (e.g., specific laws, programs, or initiatives) in simple language
-                - Describe what the government is doing (e.g., starting programs, allocating funds) based on the summary
-                - Say when women might see changes (e.g., soon, this year)
-                - Suggest 2-3 specific actions women can take to benefit from or engage with the document’s initiatives (e.g., contact a specific office, join a group, attend a meeting)
-                - Recommend where to get more information (e.g., relevant ministry, local government office)
-
-                Use short sentences and simple words for all literacy levels. Focus on practical steps and positive impacts, ensuring actions and explanations are directly tied to the document’s content.
-                """
-            )
-            
             if self.llm:
                 try:
-                    chain = prompt_template | self.llm
+                    chain = _EXPLANATION_PROMPT | self.llm
                     explanation = chain.invoke({
                         "summary_text": summary_text,
                         "region_context": region_context
@@ -85,6 +86,43 @@ class ExplanationGenerator:
             logger.error(f"Error generating explanation: {str(e)}")
             return self._get_fallback_explanation(region_name)
     
+    def generate_explanations_batch(self, summary_texts, region_names=None):
+        """
+        Generate explanations for several summaries in one batched LLM round.
+        chain.batch() lets the client pipeline the calls instead of paying
+        full request latency per summary.
+        """
+        region_names = list(region_names) if region_names else [""] * len(summary_texts)
+        if not self.llm:
+            logger.warning("OpenAI LLM unavailable, using fallback explanations for batch")
+            return [self._get_fallback_explanation(name) for name in region_names]
+
+        inputs = []
+        for summary_text, region_name in zip(summary_texts, region_names):
+            cleaned = (summary_text or "").strip().replace('\n', ' ').replace('\r', '')
+            if len(cleaned) > 500:
+                cleaned = cleaned[:500] + "..."
+            inputs.append({
+                "summary_text": cleaned,
+                "region_context": f" in {region_name}" if region_name else ""
+            })
+
+        try:
+            chain = _EXPLANATION_PROMPT | self.llm
+            results = chain.batch(inputs)
+            explanations = []
+            for result, region_name in zip(results, region_names):
+                explanation = result.content.strip() if result is not None else ""
+                if explanation and len(explanation) > 50:
+                    explanations.append(explanation)
+                else:
+                    explanations.append(self._get_fallback_explanation(region_name))
+            logger.info(f"Generated {len(explanations)} explanations in one batch")
+            return explanations
+        except Exception as e:
+            logger.error(f"Error generating batched explanations: {str(e)}")
+            return [self._get_fallback_explanation(name) for name in region_names]
+
     def _get_fallback_explanation(self, region_name=""):
         """Return a fallback explanation when model generation fails"""
         region_text = f" in {region_name}" if region_name else ""
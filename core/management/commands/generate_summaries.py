@@ -8,13 +8,20 @@ class Command(BaseCommand):
     help = 'Generate summaries for all existing documents that have not been processed'
 
     def handle(self, *args, **kwargs):
+        from core.tasks import process_document_summaries
+
         docs = Document.objects.filter(summarization_processed=False)
-        self.stdout.write(f"Found {docs.count()} documents without summaries")
-        
-        for i, doc in enumerate(docs):
-            self.stdout.write(f"Processing document {i+1}/{docs.count()}: {doc.title}")
-            # The post_save signal will handle the summary generation
-            doc.summarization_processed = False
-            doc.save()
-            
-        self.stdout.write(self.style.SUCCESS('Successfully processed all documents'))
\ No newline at end of file
+        # One COUNT up front; calling docs.count() in the loop would issue a
+        # fresh query per document
+        total = docs.count()
+        self.stdout.write(f"Found {total} documents without summaries")
+
+        # Stream ids with a server-side cursor and enqueue in chunks of 100:
+        # one broker round-trip per chunk instead of one .delay() per
+        # document, which dominates enqueue time on large backlogs.
+        doc_ids = docs.values_list('id', flat=True).iterator(chunk_size=500)
+        process_document_summaries.chunks(
+            ((doc_id,) for doc_id in doc_ids), 100
+        ).apply_async()
+
+        self.stdout.write(self.style.SUCCESS(f'Queued {total} documents for summarization'))
\ No newline at end of file
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.17 on 2026-09-01 22:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_document_pdf_file_alter_document_pdf_url'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='summary',
+            name='language',
+            field=models.CharField(choices=[('en', 'English')], db_index=True, default='en', max_length=10),
+        ),
+    ]
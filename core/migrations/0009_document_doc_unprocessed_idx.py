@@ -0,0 +1,18 @@
+# Generated by Django 5.2.17 on 2026-09-01 22:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_alter_summary_language'),
+        ('regions', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='document',
+            index=models.Index(condition=models.Q(('summarization_processed', False)), fields=['uploaded_at'], name='doc_unprocessed_idx'),
+        ),
+    ]
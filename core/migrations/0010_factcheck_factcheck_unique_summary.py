@@ -0,0 +1,29 @@
+# Generated by Django 5.2.17 on 2026-09-01 22:35
+
+from django.db import migrations, models
+
+
+def dedupe_fact_checks(apps, schema_editor):
+    """Keep only the newest fact check per summary before enforcing uniqueness."""
+    FactCheck = apps.get_model('core', 'FactCheck')
+    seen = set()
+    for fact_check in FactCheck.objects.order_by('summary_id', '-checked_at', '-id').iterator():
+        if fact_check.summary_id in seen:
+            fact_check.delete()
+        else:
+            seen.add(fact_check.summary_id)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_document_doc_unprocessed_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(dedupe_fact_checks, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='factcheck',
+            constraint=models.UniqueConstraint(fields=('summary',), name='factcheck_unique_summary'),
+        ),
+    ]
@@ -24,36 +24,51 @@ class Document(models.Model):
     def save(self, *args, **kwargs):
         from django.db import transaction
         with transaction.atomic():
-            if self.pk:
+            is_new = self.pk is None
+            update_fields = kwargs.get('update_fields')
+            if is_new:
+                verification_changed = False
+            elif update_fields is not None and not ({'is_verified', 'source_url'} & set(update_fields)):
+                # Saves that can't touch verification (e.g. flipping
+                # summarization_processed) skip the diff SELECT entirely.
+                verification_changed = False
+            else:
                 try:
-                    old_instance = Document.objects.get(pk=self.pk)
+                    old_instance = Document.objects.only('is_verified', 'source_url').get(pk=self.pk)
                     verification_changed = (
-                        old_instance.is_verified != self.is_verified or 
+                        old_instance.is_verified != self.is_verified or
                         old_instance.source_url != self.source_url
                     )
                 except Document.DoesNotExist:
                     verification_changed = True
-            else:
-                verification_changed = True
             super().save(*args, **kwargs)
+            # A brand-new document has no summaries yet, so there are no
+            # fact checks to sync on create.
             if verification_changed:
                 self.sync_verification_to_fact_checks()
 
     def sync_verification_to_fact_checks(self):
         try:
-            summaries = Summary.objects.filter(document=self)
-            for summary in summaries:
-                fact_check, created = FactCheck.objects.get_or_create(
-                    summary=summary,
-                    defaults={
-                        'source_url': self.source_url,
-                        'is_verified': self.is_verified
-                    }
+            # With fact checks unique per summary, the whole sync is one
+            # INSERT ... ON CONFLICT (summary_id) DO UPDATE statement.
+            summary_ids = list(
+                Summary.objects.filter(document_id=self.id).values_list('id', flat=True)
+            )
+            if summary_ids:
+                FactCheck.objects.bulk_create(
+                    [
+                        FactCheck(
+                            summary_id=summary_id,
+                            source_url=self.source_url,
+                            is_verified=self.is_verified
+                        )
+                        for summary_id in summary_ids
+                    ],
+                    update_conflicts=True,
+                    update_fields=['source_url', 'is_verified'],
+                    unique_fields=['summary'],
+                    batch_size=1000,
                 )
-                if not created:
-                    fact_check.source_url = self.source_url
-                    fact_check.is_verified = self.is_verified
-                    fact_check.save()
             logger.info(f"Synced verification status for document {self.id}: {self.is_verified}")
         except Exception as e:
             logger.error(f"Error syncing verification status for document {self.id}: {str(e)}")
@@ -63,12 +78,45 @@ class Document(models.Model):
         process_document_summaries.delay(self.id)
         logger.info(f"Manually triggered summarization for document {self.id}")
 
+    class Meta:
+        indexes = [
+            # Partial index over the (small) unprocessed backlog, so the
+            # retry sweeps don't scan the whole table as it grows
+            models.Index(
+                fields=['uploaded_at'],
+                condition=models.Q(summarization_processed=False),
+                name='doc_unprocessed_idx',
+            ),
+        ]
+
+# Prebuilt default-explanation text: the region-less variant is a shared
+# constant (no per-save allocation) and the region variant formats a single
+# template instead of rebuilding the sentences each time.
+_DEFAULT_EXPLANATION_TEMPLATE = (
+    "This budget{region_text} addresses gender equality and reducing social inequalities. "
+    "It may affect women's access to healthcare, education, and economic opportunities. "
+    "It could also improve conditions for marginalized groups and support vulnerable communities."
+)
+_DEFAULT_EXPLANATION = _DEFAULT_EXPLANATION_TEMPLATE.format(region_text="")
+
+def default_explanation(region_name=""):
+    """
+    Default SDG 5/10 explanation used until an LLM-generated one is stored.
+    Free function so bulk-create paths can prefill the column without going
+    through Summary.save().
+    """
+    if region_name:
+        return _DEFAULT_EXPLANATION_TEMPLATE.format(region_text=f" in {region_name}")
+    return _DEFAULT_EXPLANATION
+
 class Summary(models.Model):
     document = models.ForeignKey(Document, on_delete=models.CASCADE, related_name='summaries')
     text = models.TextField()
     original_text = models.TextField(blank=True, null=True)
     explanation = models.TextField(blank=True, null=True)
-    language = models.CharField(max_length=10, choices=[('en', 'English')], default='en')
+    # Indexed: the admin changelist filters on language and the API filters
+    # every request by it
+    language = models.CharField(max_length=10, choices=[('en', 'English')], default='en', db_index=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
@@ -83,12 +131,7 @@ class Summary(models.Model):
         super().save(*args, **kwargs)
     
     def _get_default_explanation(self, region_name=""):
-        region_text = f" in {region_name}" if region_name else ""
-        return (
-            f"This budget{region_text} addresses gender equality and reducing social inequalities. "
-            f"It may affect women's access to healthcare, education, and economic opportunities. "
-            f"It could also improve conditions for marginalized groups and support vulnerable communities."
-        )
+        return default_explanation(region_name)
     
     class Meta:
         unique_together = ('document', 'language')
@@ -102,8 +145,25 @@ class FactCheck(models.Model):
     def __str__(self):
         return f"FactCheck for {self.summary}"
 
-@receiver(post_save, sender=Document)
+    class Meta:
+        constraints = [
+            # The sync code treats fact checks as one-per-summary; enforcing
+            # that enables single-statement upserts
+            models.UniqueConstraint(fields=['summary'], name='factcheck_unique_summary'),
+        ]
+
+@receiver(post_save, sender=Document, dispatch_uid='core.document.post_save.summarize')
 def queue_document_processing(sender, instance, created, **kwargs):
+    # Fixture loads (loaddata) save with raw=True; don't fan out one Celery
+    # task per imported row.
+    if kwargs.get('raw'):
+        return
+    # A save that only flips the processed flag must not re-queue the
+    # document (the worker marks completion via queryset.update(), but other
+    # callers may still save() the field).
+    update_fields = kwargs.get('update_fields')
+    if update_fields and set(update_fields) == {'summarization_processed'}:
+        return
     if hasattr(instance, 'should_summarize') and not instance.should_summarize:
         logger.info(f"Skipping summarization for document {instance.id} as requested")
         return
@@ -119,6 +179,29 @@ def queue_document_processing(sender, instance, created, **kwargs):
             countdown=5
         )
         logger.info(f"Queued document {instance.id} for background processing with 5-second delay")
+
+# Languages the summaries API can serve (and therefore cache)
+SUMMARY_CACHE_LANGUAGES = ['en']
+
+def _invalidate_summary_cache(region_code):
+    from django.core.cache import cache
+    cache.delete_many([f'summaries:{region_code}:{lang}' for lang in SUMMARY_CACHE_LANGUAGES])
+
+@receiver(post_save, sender=Summary, dispatch_uid='core.summary.post_save.invalidate_cache')
+def invalidate_summary_cache_on_summary(sender, instance, **kwargs):
+    try:
+        _invalidate_summary_cache(instance.document.region.code)
+        logger.debug(f"Invalidated summaries cache for summary {instance.id}")
+    except Exception as e:
+        logger.error(f"Error invalidating summaries cache for summary {instance.id}: {str(e)}")
+
+@receiver(post_save, sender=Document, dispatch_uid='core.document.post_save.invalidate_cache')
+def invalidate_summary_cache_on_document(sender, instance, **kwargs):
+    try:
+        _invalidate_summary_cache(instance.region.code)
+        logger.debug(f"Invalidated summaries cache for document {instance.id}")
+    except Exception as e:
+        logger.error(f"Error invalidating summaries cache for document {instance.id}: {str(e)}")
         
         
         
@@ -0,0 +1,218 @@
+# core/sdg.py
+"""
+Shared SDG keyword matching and PDF excerpt extraction.
+
+Used by the API views, the Celery tasks, and the Summarizer so the keyword
+list, the compiled matchers, and the excerpt extractor exist exactly once.
+Deliberately Django-free so core.summarizer can import it standalone.
+"""
+import logging
+import os
+import re
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+# Shared HTTP session: PDF fetches repeatedly hit the same government hosts,
+# so keep-alive pooling amortizes TCP/TLS handshakes across documents.
+_HTTP = requests.Session()
+_http_adapter = HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=32,
+    max_retries=Retry(total=3, backoff_factor=0.3)
+)
+_HTTP.mount('https://', _http_adapter)
+_HTTP.mount('http://', _http_adapter)
+
+# Keywords marking SDG 5/10-relevant paragraphs. Compiled into one
+# alternation so each paragraph is scanned in a single pass instead of once
+# per keyword. Deliberately unanchored: both the baseline `in` scan and the
+# Aho-Corasick path match bare substrings, and the two code paths must agree
+# on which paragraphs qualify regardless of whether pyahocorasick imports.
+SDG_KEYWORDS = [
+    'gender', 'women', 'girls', 'female', 'maternal',
+    'gender-based violence', 'gender equality', 'gender parity',
+    'inequality', 'equity', 'disparity', 'marginalized', 'vulnerable',
+    'inclusion', 'inclusive', 'discrimination', 'minority',
+    'differently abled', 'disabilities', 'equal opportunity'
+]
+_SDG_RE = re.compile(
+    '|'.join(re.escape(keyword) for keyword in SDG_KEYWORDS),
+    re.IGNORECASE
+)
+
+# Fallback stored when a document's PDF yields no SDG-relevant paragraphs,
+# so enrichment can be marked done instead of being retried forever
+NO_SDG_TEXT_MESSAGE = (
+    "No specific text related to gender equality or inequality reduction "
+    "found in the document."
+)
+
+# Aho-Corasick scans all keywords in one DFA pass; optional dependency,
+# with the compiled regex as the fallback.
+try:
+    import ahocorasick
+    _SDG_AUTOMATON = ahocorasick.Automaton()
+    for _keyword in SDG_KEYWORDS:
+        _SDG_AUTOMATON.add_word(_keyword.lower(), _keyword)
+    _SDG_AUTOMATON.make_automaton()
+except ImportError:
+    _SDG_AUTOMATON = None
+
+def matches_sdg_keywords(text):
+    """Single-pass keyword test over a paragraph or whole document."""
+    if _SDG_AUTOMATON is not None:
+        return next(_SDG_AUTOMATON.iter(text.lower()), None) is not None
+    return _SDG_RE.search(text) is not None
+
+def iter_paragraphs(page_text):
+    """
+    Yield '\\n\\n'-separated paragraphs one at a time, so the limit-based
+    short-circuit in the caller skips slicing the rest of the page instead
+    of materializing every paragraph up front.
+    """
+    start = 0
+    length = len(page_text)
+    while start < length:
+        end = page_text.find('\n\n', start)
+        if end == -1:
+            yield page_text[start:]
+            return
+        yield page_text[start:end]
+        start = end + 2
+
+def collect_sdg_excerpts(page_text, excerpts, limit=3):
+    """
+    Append cleaned SDG-relevant paragraphs from one page of text to
+    ``excerpts``, stopping once ``limit`` have been collected.
+
+    No per-paragraph debug logging here: large PDFs would emit thousands of
+    log records per document even when the level filters them out.
+    """
+    for paragraph in iter_paragraphs(page_text):
+        paragraph = paragraph.strip()
+        if not paragraph or len(paragraph) < 20:
+            continue
+        if matches_sdg_keywords(paragraph):
+            # str.split/join normalizes whitespace in C, without the regex
+            # engine re.sub would spin up per paragraph
+            excerpts.append(' '.join(paragraph.split()))
+            if len(excerpts) >= limit:
+                return
+
+def document_pdf_source(document):
+    """
+    Pick the PDF source for a document: the uploaded file when present,
+    the URL otherwise, or None when the document has neither.
+    """
+    if document.pdf_file and os.path.exists(document.pdf_file.path):
+        return document.pdf_file.path
+    return document.pdf_url or None
+
+def extract_document_excerpt(document):
+    """
+    Read the document's PDF (uploaded file first, falling back to the URL,
+    mirroring the summarization tasks) and pull out up to three
+    SDG-relevant paragraphs. Runs inside Celery workers (see
+    extract_original_excerpt in core/tasks.py) — never on the request
+    thread.
+    """
+    import io
+    import pdfplumber
+    import tempfile
+
+    source = document_pdf_source(document)
+    if not source:
+        logger.warning(f"No PDF file or URL available for document {document.id}")
+        return ''
+
+    # PDFs up to this size stay in memory; larger ones spill to a tempfile
+    # so RSS remains bounded.
+    spool_max = 16 * 1024 * 1024
+
+    pdf_bytes = None
+    temp_file_path = None
+    local_path = None
+    if not source.startswith(('http://', 'https://')):
+        local_path = source
+        temp_file_path = local_path
+        logger.debug("Using local PDF path: %s", temp_file_path)
+    else:
+        logger.debug("Downloading PDF: %s", source)
+        with _HTTP.get(source, timeout=(5, 30), stream=True) as response:
+            response.raise_for_status()
+            buffer = io.BytesIO()
+            temp_file = None
+            for chunk in response.iter_content(chunk_size=64 * 1024):
+                if temp_file is not None:
+                    temp_file.write(chunk)
+                    continue
+                buffer.write(chunk)
+                if buffer.tell() > spool_max:
+                    temp_file = tempfile.NamedTemporaryFile(suffix='.pdf', delete=False)
+                    temp_file_path = temp_file.name
+                    temp_file.write(buffer.getvalue())
+                    buffer = None
+            if temp_file is not None:
+                temp_file.close()
+                logger.debug("Large PDF spilled to %s", temp_file_path)
+            else:
+                pdf_bytes = buffer.getvalue()
+                logger.debug("PDF held in memory (%d bytes)", len(pdf_bytes))
+
+    # PyMuPDF is 5-10x faster than pdfplumber for plain-text extraction,
+    # and layout fidelity doesn't matter for keyword matching. Fall back
+    # to pdfplumber if it yields nothing. Only the first three excerpts are
+    # ever used, so stop parsing pages as soon as they're collected.
+    excerpts = []
+    got_text = False
+    try:
+        import fitz
+        if pdf_bytes is not None:
+            pdf_doc = fitz.open(stream=pdf_bytes, filetype='pdf')
+        else:
+            pdf_doc = fitz.open(temp_file_path)
+        try:
+            empty_streak = 0
+            for page_index in range(min(20, pdf_doc.page_count)):
+                page_text = pdf_doc[page_index].get_text("text") or ''
+                if not page_text:
+                    # Scanned documents yield page after page with no text
+                    # layer; stop probing instead of parsing all 20.
+                    empty_streak += 1
+                    if got_text and empty_streak >= 3:
+                        break
+                    continue
+                empty_streak = 0
+                got_text = True
+                collect_sdg_excerpts(page_text, excerpts)
+                if len(excerpts) >= 3:
+                    break
+        finally:
+            pdf_doc.close()
+    except Exception as e:
+        logger.warning(f"PyMuPDF extraction failed for document {document.id}: {str(e)}")
+
+    if not got_text:
+        logger.debug("Falling back to pdfplumber for document %s", document.id)
+        pdf_source = io.BytesIO(pdf_bytes) if pdf_bytes is not None else temp_file_path
+        with pdfplumber.open(pdf_source) as pdf:
+            for page in pdf.pages[:20]:
+                page_text = page.extract_text() or ''
+                if not page_text:
+                    continue
+                collect_sdg_excerpts(page_text, excerpts)
+                if len(excerpts) >= 3:
+                    break
+
+    if local_path is None and temp_file_path:
+        try:
+            os.unlink(temp_file_path)
+            logger.debug("Deleted temp file: %s", temp_file_path)
+        except Exception as e:
+            logger.warning(f"Failed to delete temp file {temp_file_path}: {str(e)}")
+
+    logger.debug("Exiting extract_document_excerpt with %d excerpts", len(excerpts))
+    return '\n\n'.join(excerpts[:3]) if excerpts else ''
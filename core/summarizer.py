@@ -1,98 +1,240 @@
 # core/summarizer.py
 import logging
 import os
+import re
+import sys
+import threading
 import requests
 from typing import List, Dict, Any, Optional, Tuple
 
-logging.basicConfig(level=logging.INFO, 
+# SDG 5/10 keyword matching (single-pass Aho-Corasick / compiled regex) is
+# shared with the API's excerpt pipeline — see core/sdg.py.
+from core.sdg import matches_sdg_keywords
+
+logging.basicConfig(level=logging.INFO,
                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Shared session so repeated Hugging Face API calls (and retries) reuse a
+# warm HTTPS connection instead of a fresh TLS handshake per request.
+_HTTP = requests.Session()
+_HTTP.mount('https://', requests.adapters.HTTPAdapter(
+    pool_connections=8,
+    pool_maxsize=16,
+    max_retries=3
+))
+
+# TOC-filter patterns, compiled once at import — they run per line of every
+# page, where re.match with a string literal pays a cache lookup each call
+_TOC_HEADING_RE = re.compile(r'^\d+\.\d+(\.\d+)?\s+.*$')  # e.g. "2.0 Title"
+_PAGENUM_TAIL_RE = re.compile(r'\s+\d+$')  # short lines ending with a page number
+
+# All three droppable line shapes in one alternation, so the per-line filter
+# costs a single regex invocation instead of three
+_DROP_LINE_RE = re.compile(
+    r'^(?:'
+    r'\d+\.\d+(?:\.\d+)?\s+.*\s+\.+\s+\d+'  # numbered TOC entry: "2.0 Title ... 4"
+    r'|(?=.{0,99}$).*\.\.\..*'  # short line containing an ellipsis
+    r'|(?=.{0,99}$).*\s\d+'  # short line ending with a page number
+    r')$'
+)
+
+def _green_pool_active() -> bool:
+    """
+    True when eventlet/gevent monkey-patching is active (the summaries
+    Celery queue runs --pool=eventlet). asyncio must not run on a patched
+    interpreter: its selector sits on top of the green hub and can hang.
+    """
+    eventlet = sys.modules.get('eventlet')
+    if eventlet is not None:
+        try:
+            if eventlet.patcher.is_monkey_patched('socket'):
+                return True
+        except Exception:
+            pass
+    gevent_monkey = sys.modules.get('gevent.monkey')
+    if gevent_monkey is not None:
+        try:
+            if gevent_monkey.is_module_patched('socket'):
+                return True
+        except Exception:
+            pass
+    return False
+
 class Summarizer:
     """A document summarizer that uses LangChain and OpenAI."""
     
     def __init__(self):
         logger.info("Initializing Summarizer with LangChain and OpenAI")
+        # LLM response cache: map/reduce prompts repeat across runs of the
+        # same document, and cached generations skip the network and token
+        # cost entirely. Requires deterministic sampling (temperature=0).
+        try:
+            from langchain.globals import set_llm_cache
+            from langchain_community.cache import SQLiteCache
+            set_llm_cache(SQLiteCache(os.getenv("LANGCHAIN_CACHE_PATH", ".langchain.db")))
+            logger.info("Enabled SQLite LLM response cache")
+        except ImportError:
+            logger.info("langchain_community not installed, LLM response cache disabled")
         self.openai_api_key = os.getenv("OPENAI_API_KEY", "")
         self.hf_api_key = os.getenv("HF_TOKEN", "")
+        self.map_llm = None
+        # Guards lazy llm/text_splitter init: the summaries queue runs an
+        # eventlet pool, so many greenlets share this singleton
+        self._init_lock = threading.Lock()
         self.summary_type = "map_reduce"
         self.llm = None
         self.text_splitter = None
-        self.summarizer_url = "https://api-inference.huggingface.co/models/facebook/bart-large-cnn"
+        # distilbart-cnn-12-6 is the distilled BART variant: ~2x faster
+        # inference at near-identical summary quality. Override via env to
+        # fall back to the full model if needed.
+        self.summarizer_model = os.getenv("HF_SUMMARIZER_MODEL", "sshleifer/distilbart-cnn-12-6")
+        self.summarizer_url = f"https://api-inference.huggingface.co/models/{self.summarizer_model}"
         
     def extract_text_from_pdf(self, pdf_path_or_url: str) -> str:
         logger.info(f"Extracting text from PDF: {pdf_path_or_url}")
         try:
-            import pdfplumber
-            import re
-            
+            import hashlib
+
             # Handle both local file paths and URLs
+            cache_path = None
             if os.path.isfile(pdf_path_or_url):
                 logger.info(f"Using local PDF file at {pdf_path_or_url}")
                 file_path = pdf_path_or_url
             else:
+                # Content-addressed text cache: the same URL is summarized
+                # repeatedly (retries, multiple languages), and a file read
+                # beats a multi-second download + parse.
+                cache_dir = os.getenv("EASYGOV_PDF_CACHE_DIR", os.path.expanduser("~/.cache/easygov"))
+                cache_path = os.path.join(
+                    cache_dir, hashlib.sha256(pdf_path_or_url.encode()).hexdigest() + '.txt'
+                )
+                if os.path.exists(cache_path):
+                    with open(cache_path, encoding='utf-8') as cached_file:
+                        cached_text = cached_file.read()
+                    logger.info(f"Using cached extraction for {pdf_path_or_url} ({len(cached_text)} chars)")
+                    return cached_text
                 logger.info(f"Downloading from URL: {pdf_path_or_url}")
-                response = requests.get(pdf_path_or_url, timeout=120)
-                response.raise_for_status()
+                import shutil
                 import tempfile
-                with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as temp_file:
-                    temp_file.write(response.content)
-                    file_path = temp_file.name
+                # Stream network -> disk in 1MiB chunks instead of holding
+                # the whole PDF as one bytes object first
+                with _HTTP.get(pdf_path_or_url, timeout=120, stream=True) as response:
+                    response.raise_for_status()
+                    response.raw.decode_content = True
+                    with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as temp_file:
+                        shutil.copyfileobj(response.raw, temp_file, 1 << 20)
+                        file_path = temp_file.name
             
-            text = ''
+            # Accumulate page chunks in a list and join once: repeated
+            # `text +=` copies the whole prefix per page (quadratic in
+            # document size).
+            text_parts = []
+            total_chars = 0
             max_pages = 10  # Limit to first 10 pages
             logger.info(f"Opening PDF from {file_path}")
-            with pdfplumber.open(file_path) as pdf:
-                logger.info(f"PDF has {len(pdf.pages)} pages")
-                for i, page in enumerate(pdf.pages[:max_pages]):
-                    page_text = page.extract_text()
-                    if not page_text:
-                        continue
-                    
-                    # Split page into lines and check for TOC characteristics
-                    lines = page_text.split('\n')
-                    if len(lines) > 20 and max(len(line.strip()) for line in lines) < 50:
-                        logger.info(f"Skipping page {i+1} (likely TOC based on line count and length)")
+            for i, page_text in enumerate(self._iter_page_texts(file_path, max_pages)):
+                if not page_text:
+                    continue
+
+                # Split page into lines and check for TOC characteristics
+                lines = page_text.split('\n')
+                if len(lines) > 20 and max(len(line.strip()) for line in lines) < 50:
+                    logger.info(f"Skipping page {i+1} (likely TOC based on line count and length)")
+                    continue
+
+                # Filter out TOC-like lines (e.g., "2.0 ... 4", "Section Title ... 10")
+                filtered_lines = []
+                for line in lines:
+                    line = line.strip()
+                    if _DROP_LINE_RE.match(line):
                         continue
-                    
-                    # Filter out TOC-like lines (e.g., "2.0 ... 4", "Section Title ... 10")
-                    filtered_lines = []
-                    for line in lines:
-                        line = line.strip()
-                        # Skip lines that look like TOC entries
-                        if re.match(r'^\d+\.\d+(\.\d+)?\s+.*\s+\.+\s+\d+$', line):  # e.g., "2.0 Title ... 4"
-                            continue
-                        if '...' in line and len(line) < 100:  # Short lines with ellipses
-                            continue
-                        if re.search(r'\s+\d+$', line) and len(line) < 100:  # Lines ending with page numbers
-                            continue
-                        filtered_lines.append(line)
-                    
-                    page_text = '\n'.join(filtered_lines)
-                    if page_text:
-                        text += page_text + '\n'
-            
+                    filtered_lines.append(line)
+
+                page_text = '\n'.join(filtered_lines)
+                if page_text:
+                    text_parts.append(page_text)
+                    total_chars += len(page_text) + 1
+                    if total_chars >= 10000:
+                        # Everything past the cap gets truncated below;
+                        # don't pay to parse it
+                        logger.info(f"Reached 10,000-char cap at page {i+1}, stopping extraction")
+                        break
+
+            text = ''.join(part + '\n' for part in text_parts)
+
             if not os.path.isfile(pdf_path_or_url):
                 os.unlink(file_path)
                 logger.info(f"Deleted temp file: {file_path}")
             
             logger.info(f"Extracted {len(text)} characters from PDF")
-            return text[:10000]  # Cap at 10,000 characters
+            text = text[:10000]  # Cap at 10,000 characters
+            if cache_path:
+                try:
+                    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+                    with open(cache_path, 'w', encoding='utf-8') as cached_file:
+                        cached_file.write(text)
+                    logger.info(f"Cached extraction to {cache_path}")
+                except OSError as e:
+                    logger.warning(f"Could not write extraction cache: {str(e)}")
+            return text
         except Exception as e:
             logger.error(f"Error extracting text: {str(e)}")
             return f"Error extracting text: {str(e)}"
 
+    def _iter_page_texts(self, file_path: str, max_pages: int):
+        """
+        Yield raw text for the first ``max_pages`` pages, lazily so callers
+        can stop at the character cap. Uses PDFium's C++ extractor when
+        pypdfium2 is available — typically an order of magnitude faster than
+        the pure-Python pdfminer stack — with pdfplumber as the fallback.
+        """
+        try:
+            import pypdfium2 as pdfium
+        except ImportError:
+            pdfium = None
+
+        if pdfium is not None:
+            try:
+                pdf = pdfium.PdfDocument(file_path)
+            except Exception as e:
+                logger.warning(f"pypdfium2 could not open PDF, falling back to pdfplumber: {str(e)}")
+                pdf = None
+            if pdf is not None:
+                try:
+                    logger.info(f"PDF has {len(pdf)} pages (pypdfium2)")
+                    for index in range(min(max_pages, len(pdf))):
+                        textpage = pdf[index].get_textpage()
+                        try:
+                            yield textpage.get_text_range() or ''
+                        finally:
+                            textpage.close()
+                finally:
+                    pdf.close()
+                return
+
+        import pdfplumber
+        with pdfplumber.open(file_path) as pdf:
+            logger.info(f"PDF has {len(pdf.pages)} pages")
+            for page in pdf.pages[:max_pages]:
+                try:
+                    # Tight tolerances skip most of pdfminer's layout
+                    # clustering, which this keyword workload can't use
+                    yield page.extract_text(x_tolerance=2, y_tolerance=2) or ''
+                finally:
+                    # pdfplumber keeps parsed chars cached per page; flush
+                    # so peak memory stays one page, not ten
+                    page.flush_cache()
+
     def _extract_sdg_relevant_text(self, text: str) -> str:
         logger.info(f"Extracting SDG-relevant text")
-        keywords = [
-            'gender', 'women', 'girls', 'female', 'maternal',
-            'gender-based violence', 'gender equality', 'gender parity',
-            'inequality', 'equity', 'disparity', 'marginalized', 'vulnerable',
-            'inclusion', 'inclusive', 'discrimination', 'minority',
-            'differently abled', 'disabilities', 'equal opportunity'
-        ]
-        
-        import re
+        # One linear scan over the whole document first: many budget PDFs
+        # contain no SDG keywords at all, and those skip the per-paragraph
+        # loop (split, strip, TOC checks) entirely.
+        if not matches_sdg_keywords(text):
+            logger.warning("No SDG-relevant text found, using original text")
+            return text[:4000]
+
         relevant_paragraphs = []
         paragraphs = text.split('\n')
         logger.info(f"Analyzing {len(paragraphs)} paragraphs for SDG relevance")
@@ -103,12 +245,12 @@ class Summarizer:
             if len(paragraph) < 50:
                 continue
             # Skip paragraphs that look like TOC entries
-            if re.match(r'^\d+\.\d+(\.\d+)?\s+.*$', paragraph):  # e.g., "2.0 Title"
+            if _TOC_HEADING_RE.match(paragraph):  # e.g., "2.0 Title"
                 continue
-            if '...' in paragraph or re.search(r'\s+\d+$', paragraph):  # Ellipses or page numbers
+            if '...' in paragraph or _PAGENUM_TAIL_RE.search(paragraph):  # Ellipses or page numbers
                 continue
-            # Check for SDG keywords
-            if any(keyword.lower() in paragraph.lower() for keyword in keywords):
+            # Check for SDG keywords in one pass
+            if matches_sdg_keywords(paragraph):
                 relevant_paragraphs.append(paragraph)
         
         relevant_text = '\n'.join(relevant_paragraphs)
@@ -127,16 +269,18 @@ class Summarizer:
             from langchain_text_splitters import CharacterTextSplitter
             
             if not self.text_splitter:
-                try:
-                    self.text_splitter = CharacterTextSplitter.from_tiktoken_encoder(
-                        chunk_size=4000, 
-                        chunk_overlap=200
-                    )
-                except ImportError:
-                    self.text_splitter = CharacterTextSplitter(
-                        chunk_size=4000,
-                        chunk_overlap=200
-                    )
+                with self._init_lock:
+                    if not self.text_splitter:
+                        try:
+                            self.text_splitter = CharacterTextSplitter.from_tiktoken_encoder(
+                                chunk_size=4000,
+                                chunk_overlap=200
+                            )
+                        except ImportError:
+                            self.text_splitter = CharacterTextSplitter(
+                                chunk_size=4000,
+                                chunk_overlap=200
+                            )
             
             docs = [Document(page_content=text)]
             split_docs = self.text_splitter.split_documents(docs)
@@ -146,6 +290,28 @@ class Summarizer:
             logger.error(f"Error creating LangChain documents: {str(e)}")
             return []
 
+    def _get_map_llm(self) -> Any:
+        """
+        Cheaper, output-capped model for the map stage. Map calls dominate
+        token spend (one per chunk), and short per-chunk summaries don't
+        need the reduce model's budget.
+        """
+        if self.map_llm is None and self.openai_api_key:
+            with self._init_lock:
+                if self.map_llm is None:
+                    try:
+                        from langchain_openai import ChatOpenAI
+                        self.map_llm = ChatOpenAI(
+                            temperature=0,
+                            model_name=os.getenv("MAP_LLM_MODEL", "gpt-3.5-turbo"),
+                            max_tokens=150,
+                            openai_api_key=self.openai_api_key
+                        )
+                        logger.info("Initialized map-stage LLM for summarization")
+                    except Exception as e:
+                        logger.error(f"Failed to initialize map-stage LLM: {str(e)}")
+        return self.map_llm or self.llm
+
     def _create_map_reduce_chain(self) -> Any:
         try:
             from langchain.chains.combine_documents.stuff import StuffDocumentsChain
@@ -161,7 +327,7 @@ class Summarizer:
             social inclusion, and sustainable development:
             """
             map_prompt = PromptTemplate.from_template(map_template)
-            map_chain = LLMChain(llm=self.llm, prompt=map_prompt)
+            map_chain = LLMChain(llm=self._get_map_llm(), prompt=map_prompt)
             
             reduce_template = """
             The following are summaries of sections from a document:
@@ -205,15 +371,26 @@ class Summarizer:
                 return "No Hugging Face API key provided for summarization."
                 
             headers = {"Authorization": f"Bearer {self.hf_api_key}"}
+            input_text = text[:4000]
+            # Scale the requested summary length to the input: demanding 150
+            # tokens from a short excerpt only makes the decoder pad and
+            # drift. A chars/4 estimate is close enough for length budgeting.
+            approx_input_tokens = max(1, len(input_text) // 4)
+            max_length = min(150, max(30, approx_input_tokens // 2))
+            min_length = min(50, max(10, max_length // 3))
             payload = {
-                "inputs": text[:4000],
+                "inputs": input_text,
                 "parameters": {
-                    "max_length": 150,
-                    "min_length": 50,
-                    "do_sample": False
+                    "max_length": max_length,
+                    "min_length": min_length,
+                    "do_sample": False,
+                    # Greedy decoding: beam search multiplies decoder work
+                    # ~num_beams x for little gain on budget summaries
+                    "num_beams": 1,
+                    "early_stopping": True
                 }
             }
-            response = requests.post(self.summarizer_url, headers=headers, json=payload, timeout=30)
+            response = _HTTP.post(self.summarizer_url, headers=headers, json=payload, timeout=30)
             response.raise_for_status()
             result = response.json()
             
@@ -243,29 +420,45 @@ class Summarizer:
                 logger.warning("Not enough text to summarize")
                 return "Not enough relevant text found in document to generate a summary.", filtered_text
                 
-            llm_initialized = False
             if self.llm is None and self.openai_api_key:
-                try:
-                    from langchain_openai import ChatOpenAI
-                    self.llm = ChatOpenAI(
-                        temperature=0.3, 
-                        model_name="gpt-3.5-turbo",
-                        openai_api_key=self.openai_api_key
-                    )
-                    llm_initialized = True
-                    logger.info("Initialized OpenAI LLM for summarization")
-                except Exception as e:
-                    logger.error(f"Failed to initialize OpenAI LLM: {str(e)}")
-            
+                with self._init_lock:
+                    if self.llm is None:
+                        try:
+                            from langchain_openai import ChatOpenAI
+                            self.llm = ChatOpenAI(
+                                temperature=0,  # deterministic, so responses are cache-eligible
+                                model_name="gpt-3.5-turbo",
+                                openai_api_key=self.openai_api_key
+                            )
+                            logger.info("Initialized OpenAI LLM for summarization")
+                        except Exception as e:
+                            logger.error(f"Failed to initialize OpenAI LLM: {str(e)}")
+
             summary = ""
-            if self.llm is not None and llm_initialized:
+            if self.llm is not None:
                 try:
                     logger.info(f"Using LangChain {self.summary_type} chain for summarization")
                     langchain_docs = self._create_langchain_docs(filtered_text)
                     if langchain_docs:
                         chain = self._create_map_reduce_chain()
                         if chain:
-                            summary = chain.run(langchain_docs)
+                            if _green_pool_active():
+                                # Green-threaded workers get their
+                                # concurrency from the pool itself; asyncio
+                                # on a monkey-patched interpreter hangs
+                                summary = chain.run(langchain_docs)
+                            else:
+                                try:
+                                    # The map step issues one LLM call per
+                                    # chunk; running the chain async fires
+                                    # them concurrently, so map latency is
+                                    # the max of the calls, not their sum.
+                                    import asyncio
+                                    summary = asyncio.run(chain.arun(langchain_docs))
+                                except RuntimeError:
+                                    # Already inside an event loop; fall
+                                    # back to the sequential path
+                                    summary = chain.run(langchain_docs)
                             logger.info(f"Generated {len(summary)} character summary via LangChain")
                 except Exception as e:
                     logger.error(f"Error using LangChain for summarization: {str(e)}")
@@ -1,30 +1,124 @@
 # core/tasks.py
 import logging
+import threading
 from celery import shared_task
-from django.db import transaction
-import time
+from celery.exceptions import Retry
 import os
 
 logger = logging.getLogger(__name__)
 
+# Leaked prompt instructions start within the first sentences of a bad
+# generation, so a bounded find() is enough to detect them.
+_PROMPT_LEAK_SENTINEL = "Be specific about both positive and negative impacts"
+
+_summarizer = None
+_summarizer_lock = threading.Lock()
+
+def get_summarizer():
+    """
+    Return a process-wide Summarizer instance. Construction can be expensive
+    (API clients, tokenizer setup), so build it once per worker process and
+    reuse it across tasks instead of instantiating per task. Double-checked
+    lock so threaded/gevent workers don't race two instances into memory.
+    """
+    global _summarizer
+    if _summarizer is None:
+        with _summarizer_lock:
+            if _summarizer is None:
+                from core.summarizer import Summarizer
+                _summarizer = Summarizer()
+                logger.info("Initialized shared Summarizer instance for this worker")
+    return _summarizer
+
+_explanation_generator = None
+_explanation_generator_lock = threading.Lock()
+
+def get_explanation_generator():
+    """
+    Return a process-wide ExplanationGenerator. It opens an OpenAI client on
+    construction, so pay that cost once per worker instead of per task.
+    """
+    global _explanation_generator
+    if _explanation_generator is None:
+        with _explanation_generator_lock:
+            if _explanation_generator is None:
+                from core.explanation_generator import ExplanationGenerator
+                _explanation_generator = ExplanationGenerator()
+                logger.info("Initialized shared ExplanationGenerator instance for this worker")
+    return _explanation_generator
+
 @shared_task(bind=True, max_retries=3)
 def process_document_summaries(self, document_id):
+    """
+    Fan out one summarization subtask per missing language and mark the
+    document processed once all of them complete (chord callback).
+    Languages run in parallel across workers instead of serially in one
+    task, and per-attempt retries are handled natively by the subtasks.
+    """
+    from celery import chord
     from core.models import Document, Summary
     logger.debug(f"Starting task process_document_summaries for document_id={document_id}")
     try:
-        document = Document.objects.get(id=document_id)
-        logger.info(f"Processing document in background: {document.title} (id={document_id})")
-        if document.summarization_processed:
-            logger.info(f"Document {document_id} already processed, skipping")
-            return
-            
-        from core.summarizer import Summarizer
-        from core.explanation_generator import ExplanationGenerator
-        summarizer = Summarizer()
-        explanation_generator = ExplanationGenerator()
-        languages = ['en']  # Only English summaries
-        
-        # Determine the PDF source - prefer local file if available, otherwise use URL
+        document = Document.objects.only('id', 'summarization_processed').get(id=document_id)
+    except Document.DoesNotExist:
+        logger.error(f"Document {document_id} not found, cannot process")
+        return
+
+    if document.summarization_processed:
+        logger.info(f"Document {document_id} already processed, skipping")
+        return
+
+    languages = ['en']  # Only English summaries
+    existing = set(
+        Summary.objects.filter(document_id=document_id, language__in=languages)
+        .values_list('language', flat=True)
+    )
+    missing = [lang for lang in languages if lang not in existing]
+
+    if not missing:
+        Document.objects.filter(id=document_id).update(summarization_processed=True)
+        logger.info(f"All summaries already exist for document {document_id}, marked processed")
+        return
+
+    chord(
+        [summarize_document_task.s(document_id, lang) for lang in missing]
+    )(finalize_document_summaries.s(document_id))
+    logger.info(f"Dispatched {len(missing)} summarization subtasks for document {document_id}")
+
+@shared_task
+def finalize_document_summaries(results, document_id):
+    """
+    Chord callback: every language subtask has finished, so record
+    completion with a direct UPDATE (no save(), no signal dispatch).
+    """
+    from core.models import Document
+    Document.objects.filter(id=document_id).update(summarization_processed=True)
+    logger.info(f"Marked document {document_id} as processed")
+
+@shared_task(bind=True, max_retries=3)
+def summarize_document_task(self, document_id, language='en'):
+    """
+    Generate a single summary for one document/language pair.
+    Dispatched from the API when a request finds documents without a summary,
+    so the request thread never blocks on PDF downloads or LLM calls.
+    """
+    from core.models import Document, Summary
+    logger.debug(f"Starting summarize_document_task for document_id={document_id}, language={language}")
+    try:
+        # Region is needed for the default explanation and cache key; fetch
+        # it in the same query instead of lazy-loading it later
+        document = Document.objects.select_related('region').get(id=document_id)
+    except Document.DoesNotExist:
+        logger.error(f"Document {document_id} not found, cannot summarize")
+        return
+
+    if Summary.objects.filter(document=document, language=language).exists():
+        logger.info(f"Summary for document {document_id} in {language} already exists, skipping")
+        return
+
+    try:
+        summarizer = get_summarizer()
+
         if document.pdf_file and os.path.exists(document.pdf_file.path):
             pdf_source = document.pdf_file.path
             logger.info(f"Using local PDF file: {pdf_source}")
@@ -33,116 +127,194 @@ def process_document_summaries(self, document_id):
             logger.info(f"Using PDF URL: {pdf_source}")
         else:
             logger.error(f"No PDF file or URL available for document {document_id}")
-            raise ValueError("No PDF file or URL provided")
-        
-        for lang in languages:
-            if not Summary.objects.filter(document=document, language=lang).exists():
-                logger.debug(f"Processing summary for language={lang}")
-                try:
-                    max_retries = 3
-                    summary_text, original_text = None, None
-                    for attempt in range(max_retries):
-                        try:
-                            logger.debug(f"Attempt {attempt+1}/{max_retries} to summarize document {document_id} in {lang}")
-                            summary_text, original_text = summarizer.summarize_document(pdf_source)
-                            
-                            # Log types for debugging
-                            logger.debug(f"summary_text type: {type(summary_text)}, value: {summary_text[:100] if summary_text else 'None'}")
-                            logger.debug(f"original_text type: {type(original_text)}, value: {original_text[:100] if original_text else 'None'}")
-                            
-                            # Check if the result indicates an error
-                            if isinstance(summary_text, str) and summary_text.startswith("Error"):
-                                logger.warning(f"Summarization returned an error: {summary_text}")
-                                if attempt == max_retries - 1:
-                                    logger.error(f"All {max_retries} attempts failed with: {summary_text}")
-                                    break
-                                else:
-                                    logger.warning(f"Retrying after error, attempt {attempt+1}/{max_retries}")
-                                    time.sleep(2)
-                                    continue
-                                    
-                            logger.debug(f"Summary generated: {summary_text[:100]}...")
-                            break
-                        except ValueError as ve:
-                            logger.error(f"Value error in attempt {attempt+1}: {str(ve)}")
-                            if attempt == max_retries - 1:
-                                raise
-                            time.sleep(2)
-                        except Exception as e:
-                            if attempt == max_retries - 1:
-                                logger.error(f"All {max_retries} attempts to summarize document {document_id} ({lang}) failed: {str(e)}")
-                                summary_text = f"This document contains budget information for {document.title}."
-                                original_text = None
-                            else:
-                                logger.warning(f"Attempt {attempt+1}/{max_retries} failed: {str(e)}, retrying...")
-                                time.sleep(2)
-                    
-                    # Ensure we have at least a basic summary if all else fails
-                    if not summary_text:
-                        summary_text = f"This document contains budget information for {document.title}."
-                    
-                    with transaction.atomic():
-                        logger.info(f"Summary text to store: {summary_text[:200]}...")
-                        logger.info(f"Original text to store: {original_text[:200] if original_text else 'None'}...")
-                        summary = Summary.objects.create(
-                            document=document,
-                            text=summary_text,
-                            original_text=original_text,
-                            language=lang
-                        )
-                        logger.debug(f"Created summary id={summary.id} for language={lang}")
-                    
-                    # Generate explanation only for valid summaries
-                    try:
-                        if not summary_text.startswith("Error") and not summary_text.startswith("Failed"):
-                            region_name = document.region.name if document.region else ""
-                            logger.debug(f"Generating explanation for summary {summary.id} with region={region_name}")
-                            
-                            try:
-                                explanation = explanation_generator.generate_explanation(summary_text, region_name)
-                            except Exception as expl_error:
-                                logger.error(f"Error from explanation generator: {str(expl_error)}")
-                                explanation = "This document may support gender equality and reduce social inequalities."
-                            
-                            with transaction.atomic():
-                                summary.explanation = explanation
-                                summary.save(update_fields=['explanation'])
-                                logger.debug(f"Saved explanation for summary {summary.id}: {explanation[:100]}...")
-                        else:
-                            logger.warning(f"Skipping explanation generation for error summary: {summary_text[:100]}")
-                    except Exception as e:
-                        logger.error(f"Error handling explanation for summary {summary.id}: {str(e)}")
-                    
-                    logger.info(f"Successfully created {lang} summary for document {document_id}")
-                except Exception as e:
-                    logger.error(f"Error creating {lang} summary for document {document_id}: {str(e)}")
-                    try:
-                        with transaction.atomic():
-                            Summary.objects.create(
-                                document=document,
-                                text=f"Error generating summary: {str(e)}",
-                                original_text=None,
-                                language=lang
-                            )
-                            logger.debug(f"Created placeholder summary for language={lang}")
-                    except Exception as inner_e:
-                        logger.error(f"Failed to create placeholder summary: {str(inner_e)}")
+            return
+
+        # Duplicate documents (same URL under different rows, task retries)
+        # shouldn't re-run the whole download + LLM pipeline: key the final
+        # summarization result on the PDF source and language.
+        import hashlib
+        from django.core.cache import cache
+        source_hash = hashlib.sha256(pdf_source.encode()).hexdigest()[:24]
+        summary_cache_key = f"summary:{source_hash}:{language}"
+        cached = cache.get(summary_cache_key)
+        if cached is not None:
+            summary_text, original_text = cached
+            logger.info(f"Summarization result for document {document_id} served from cache")
+        else:
+            summary_text, original_text = summarizer.summarize_document(pdf_source)
+            if summary_text and not summary_text.startswith(("Error", "Failed")):
+                cache.set(summary_cache_key, (summary_text, original_text), 30 * 86400)
+            elif self.request.retries < self.max_retries:
+                # The Summarizer reports failures as "Error…"/"Failed…"
+                # strings rather than raising. Persisting one would park it
+                # permanently behind the unique (document, language) row, so
+                # retry like the baseline did and only keep a placeholder
+                # after the final attempt.
+                retry_in = 2 ** self.request.retries
+                logger.warning(
+                    f"Summarization failed for document {document_id} "
+                    f"(attempt {self.request.retries + 1}/{self.max_retries + 1}), "
+                    f"retrying in {retry_in}s: {summary_text[:100] if summary_text else 'empty result'}"
+                )
+                raise self.retry(countdown=retry_in)
             else:
-                logger.info(f"Summary for document {document_id} in {lang} already exists, skipping")
-        
-        with transaction.atomic():
-            document.summarization_processed = not summary_text.startswith("Error")
-            Document.objects.filter(id=document.id).update(summarization_processed=document.summarization_processed)
-            logger.info(f"Successfully processed all summaries for document {document_id}")
-    
-    except Document.DoesNotExist:
-        logger.error(f"Document {document_id} not found, cannot process")
+                logger.error(
+                    f"All summarization attempts for document {document_id} ({language}) "
+                    f"failed, persisting placeholder: {summary_text[:100] if summary_text else 'empty result'}"
+                )
+        if not summary_text:
+            summary_text = f"This document contains budget information for {document.title}."
+
+        # Single INSERT ... ON CONFLICT DO NOTHING: no Summary.save() and
+        # concurrency-safe against the unique (document, language)
+        # constraint. explanation stays NULL so the LLM task (queued below)
+        # and the backfill sweep can tell the row still needs one.
+        from core.models import _invalidate_summary_cache
+        region_name = document.region.name if document.region_id else ''
+        Summary.objects.bulk_create(
+            [Summary(
+                document=document,
+                language=language,
+                text=summary_text,
+                original_text=original_text,
+                explanation=None
+            )],
+            ignore_conflicts=True
+        )
+        # bulk_create skips post_save, so clear the response cache directly
+        _invalidate_summary_cache(document.region.code)
+        logger.info(f"Stored {language} summary for document {document_id}")
+
+        # ignore_conflicts means bulk_create can't report the new pk; fetch
+        # it to hand the row to the explanation worker.
+        summary_id = (
+            Summary.objects.filter(document=document, language=language, explanation__isnull=True)
+            .values_list('id', flat=True)
+            .first()
+        )
+        if summary_id and not summary_text.startswith(("Error", "Failed")):
+            generate_explanation_task.delay(summary_id, region_name)
+            logger.debug(f"Queued explanation generation for summary {summary_id}")
+    except Retry:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to summarize document {document_id} ({language}): {str(e)}")
+        retry_in = 2 ** self.request.retries
+        logger.info(f"Retrying summarize_document_task in {retry_in} seconds (retry #{self.request.retries+1})")
+        raise self.retry(exc=e, countdown=retry_in)
+
+@shared_task(bind=True, max_retries=3)
+def extract_original_excerpt(self, summary_id):
+    """
+    Populate Summary.original_text from the document PDF in the background.
+    The extraction itself is cached per document, so multiple summaries for
+    the same document only parse the PDF once.
+    """
+    from django.core.cache import cache
+    from core.models import Summary
+    logger.debug(f"Starting extract_original_excerpt for summary_id={summary_id}")
+    try:
+        summary = Summary.objects.select_related('document').get(id=summary_id)
+    except Summary.DoesNotExist:
+        logger.error(f"Summary {summary_id} not found, cannot extract excerpt")
+        return
+
+    if summary.original_text:
+        logger.info(f"Summary {summary_id} already has original_text, skipping")
+        return
+
+    try:
+        import hashlib
+        from core.sdg import (
+            NO_SDG_TEXT_MESSAGE,
+            document_pdf_source,
+            extract_document_excerpt,
+        )
+        source = document_pdf_source(summary.document)
+        if not source:
+            logger.error(f"No PDF file or URL available for summary {summary_id}, cannot extract")
+            return
+        # Key on the source hash as well as the document id, so pointing a
+        # document at a new file/URL naturally invalidates the extraction.
+        source_hash = hashlib.sha256(source.encode()).hexdigest()[:16]
+        result = cache.get_or_set(
+            f"doc_excerpt:{summary.document_id}:{source_hash}",
+            lambda: extract_document_excerpt(summary.document),
+            timeout=None
+        )
+        if result:
+            summary.original_text = result
+            summary.save(update_fields=['original_text'])
+            logger.info(f"Stored original_text for summary {summary_id} ({len(result)} chars)")
+        else:
+            # Record the fallback so the row counts as enriched and the
+            # backfill window can advance past no-SDG-text documents.
+            logger.warning(f"No SDG-relevant text found in document {summary.document_id}")
+            summary.original_text = NO_SDG_TEXT_MESSAGE
+            summary.save(update_fields=['original_text'])
     except Exception as e:
-        logger.error(f"Failed to process document {document_id}: {str(e)}")
+        logger.error(f"Failed to extract excerpt for summary {summary_id}: {str(e)}")
         retry_in = 2 ** self.request.retries
-        logger.info(f"Retrying task in {retry_in} seconds (retry #{self.request.retries+1})")
         raise self.retry(exc=e, countdown=retry_in)
 
+@shared_task(bind=True, max_retries=3)
+def generate_explanation_task(self, summary_id, region_name=''):
+    """
+    Populate Summary.explanation via the LLM in the background.
+    """
+    from core.models import Summary
+    logger.debug(f"Starting generate_explanation_task for summary_id={summary_id}")
+    try:
+        summary = Summary.objects.select_related('document__region').get(id=summary_id)
+    except Summary.DoesNotExist:
+        logger.error(f"Summary {summary_id} not found, cannot generate explanation")
+        return
+
+    if summary.explanation:
+        logger.info(f"Summary {summary_id} already has an explanation, skipping")
+        return
+
+    from django.core.cache import cache
+
+    # Singleflight: several requests can queue the same summary before the
+    # first task stores its result. cache.add is atomic, so only one worker
+    # generates; the rest skip and let the holder populate the row.
+    lock_key = f"lock:expl:{summary_id}"
+    if not cache.add(lock_key, 1, 120):
+        logger.info(f"Explanation for summary {summary_id} already being generated, skipping")
+        return
+
+    try:
+        import hashlib
+        region_context = region_name or (summary.document.region.name if summary.document.region else '')
+
+        # Summary text rarely changes, so an exact-match cache spares both
+        # LLM latency and API spend on regenerations (e.g. after the
+        # explanation column is cleared or a summary row is recreated).
+        text_hash = hashlib.sha256(summary.text.encode()).hexdigest()[:16]
+        explanation_cache_key = f"expl:{summary_id}:{text_hash}"
+        explanation = cache.get(explanation_cache_key)
+
+        if explanation is None:
+            explanation_generator = get_explanation_generator()
+            explanation = explanation_generator.generate_explanation(summary.text, region_context)
+            if (not explanation or len(explanation) < 50
+                    or explanation.find(_PROMPT_LEAK_SENTINEL, 0, 300) != -1):
+                explanation = explanation_generator._get_fallback_explanation(region_context)
+            cache.set(explanation_cache_key, explanation, 7 * 86400)
+        else:
+            logger.info(f"Explanation for summary {summary_id} served from cache")
+
+        summary.explanation = explanation
+        summary.save(update_fields=['explanation'])
+        logger.info(f"Stored explanation for summary {summary_id}")
+    except Exception as e:
+        logger.error(f"Failed to generate explanation for summary {summary_id}: {str(e)}")
+        retry_in = 2 ** self.request.retries
+        raise self.retry(exc=e, countdown=retry_in)
+    finally:
+        cache.delete(lock_key)
+
 @shared_task
 def queue_document_processing(document_id):
     """
@@ -152,21 +324,80 @@ def queue_document_processing(document_id):
     logger.info(f"Queueing document {document_id} for processing")
     process_document_summaries.delay(document_id)
 
+@shared_task
+def backfill_missing_excerpts():
+    """
+    Bulk warm-up counterpart to the on-demand dispatch in the API: queue
+    excerpt extraction for summaries still missing original_text, so caches
+    are hot before users ask. Suitable for deploy-time or beat scheduling.
+    """
+    from django.db.models import Q
+    from core.models import Summary
+    # Skip summaries whose document has no PDF at all — extraction can never
+    # succeed for them and they would head-of-line block the id window.
+    summary_ids = list(
+        Summary.objects.filter(original_text__isnull=True)
+        .filter(~Q(document__pdf_file='') | ~Q(document__pdf_url=''))
+        .order_by('id')
+        .values_list('id', flat=True)[:100]
+    )
+    for summary_id in summary_ids:
+        extract_original_excerpt.delay(summary_id)
+    if summary_ids:
+        logger.info(f"Queued excerpt extraction for {len(summary_ids)} summaries")
+
+@shared_task
+def backfill_missing_explanations(batch_size=8):
+    """
+    Periodic warm-up: generate explanations for summaries that lack one,
+    batching the LLM calls instead of paying per-summary request latency.
+    """
+    from core.models import Summary
+    summaries = list(
+        Summary.objects.filter(explanation__isnull=True)
+        .select_related('document__region')
+        .order_by('id')[:50]
+    )
+    if not summaries:
+        logger.debug("No summaries missing explanations")
+        return
+
+    explanation_generator = get_explanation_generator()
+    for start in range(0, len(summaries), batch_size):
+        batch = summaries[start:start + batch_size]
+        texts = [summary.text for summary in batch]
+        regions = [
+            summary.document.region.name if summary.document.region else ''
+            for summary in batch
+        ]
+        explanations = explanation_generator.generate_explanations_batch(texts, regions)
+        for summary, explanation in zip(batch, explanations):
+            summary.explanation = explanation
+        Summary.objects.bulk_update(batch, ['explanation'])
+        logger.info(f"Backfilled explanations for {len(batch)} summaries")
+
 @shared_task
 def retry_failed_documents():
     """
     Periodic task to retry processing documents that failed in previous attempts.
     Looks for documents that have no summary and are not marked as processed.
     """
-    from core.models import Document, Summary
+    from core.models import Document
     from django.db.models import Count, Q
-    
-    candidates = Document.objects.annotate(
-        summary_count=Count('summary')
-    ).filter(
-        Q(summary_count=0) | Q(summarization_processed=False)
-    ).order_by('created_at')[:10]  # Process in small batches
-    
-    for document in candidates:
-        logger.info(f"Retrying failed document {document.id}: {document.title}")
-        queue_document_processing.delay(document.id)
\ No newline at end of file
+
+    candidate_ids = list(
+        Document.objects.annotate(summary_count=Count('summaries'))
+        .filter(Q(summary_count=0) | Q(summarization_processed=False))
+        .order_by('uploaded_at')
+        .values_list('id', flat=True)[:10]  # Process in small batches
+    )
+    if not candidate_ids:
+        logger.debug("No failed documents to retry")
+        return
+
+    logger.info(f"Retrying {len(candidate_ids)} failed documents")
+    # One broker round-trip for the whole batch; the per-document fan-out
+    # (and per-language parallelism) happens inside the processing task
+    process_document_summaries.chunks(
+        [(doc_id,) for doc_id in candidate_ids], 10
+    ).apply_async()
\ No newline at end of file
@@ -1,9 +1,17 @@
 # regions/models.py
+from django.core.cache import cache
 from django.db import models
+from django.db.models.signals import post_save
+from django.dispatch import receiver
 
 class Region(models.Model):
     name = models.CharField(max_length=100)
     code = models.CharField(max_length=10, unique=True)
 
     def __str__(self):
-        return self.name
\ No newline at end of file
+        return self.name
+
+@receiver(post_save, sender=Region, dispatch_uid='regions.region.post_save.invalidate_cache')
+def invalidate_region_cache(sender, instance, **kwargs):
+    # The API caches regions by code (see core.api_views._get_region)
+    cache.delete(f'region:{instance.code}')
\ No newline at end of file